@@ -15,6 +15,29 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Content types for uploaded files, keyed by lowercase file extension
+_CONTENT_TYPES: Dict[str, str] = {
+    '.mp4': 'video/mp4',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.mp3': 'audio/mpeg',
+    '.m4a': 'audio/mp4',
+    '.wav': 'audio/wav',
+    '.srt': 'text/srt',
+    '.vtt': 'text/vtt',
+    '.txt': 'text/plain',
+    '.json': 'application/json',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+}
+
+
+def _get_content_type(file_path: str) -> str:
+    """Determine content type based on file extension."""
+    return _CONTENT_TYPES.get(Path(file_path).suffix.lower(), 'application/octet-stream')
+
 
 class StorageHandler(ABC):
     """
@@ -478,24 +501,7 @@ class S3StorageHandler(StorageHandler):
 
     def _get_content_type(self, file_path: str) -> str:
         """Determine content type based on file extension."""
-        extension = Path(file_path).suffix.lower()
-        content_types = {
-            '.mp4': 'video/mp4',
-            '.mkv': 'video/x-matroska',
-            '.webm': 'video/webm',
-            '.mp3': 'audio/mpeg',
-            '.m4a': 'audio/mp4',
-            '.wav': 'audio/wav',
-            '.srt': 'text/srt',
-            '.vtt': 'text/vtt',
-            '.txt': 'text/plain',
-            '.json': 'application/json',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.webp': 'image/webp',
-        }
-        return content_types.get(extension, 'application/octet-stream')
+        return _get_content_type(file_path)
 
 
 def get_storage_handler() -> StorageHandler:
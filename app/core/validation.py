@@ -7,11 +7,12 @@ to protect against various attacks and ensure data integrity.
 
 import re
 import html
-import bleach
-from typing import Optional, List, Dict, Any, Union
-from urllib.parse import urlparse, parse_qs
+import functools
+import nh3
+from typing import Annotated, Optional, List, Dict, Any, Tuple, Union
+from urllib.parse import ParseResult, urlparse, parse_qs
 import validators
-from pydantic import field_validator, model_validator, validator
+from pydantic import AfterValidator, Field, model_validator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ class InputValidator:
         r'(?:https?://)?(?:www\.)?youtube\.com/v/([a-zA-Z0-9_-]{11})',
         r'(?:https?://)?m\.youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})',
     ]
+    _YOUTUBE_REGEXES = tuple(re.compile(pattern) for pattern in YOUTUBE_PATTERNS)
     
     # Dangerous patterns to check for
     DANGEROUS_PATTERNS = [
@@ -48,6 +50,14 @@ class InputValidator:
         r'<meta',                    # meta tags
         r'<link',                    # link tags
     ]
+    # Browsers and SQL engines only fold ASCII case for these tokens, so skip Unicode case folding
+    _DANGEROUS_REGEXES = tuple(re.compile(pattern, re.IGNORECASE | re.ASCII) for pattern in DANGEROUS_PATTERNS)
+    _ANY_DANGEROUS_REGEX = re.compile(
+        '|'.join(f'(?:{pattern})' for pattern in DANGEROUS_PATTERNS),
+        re.IGNORECASE | re.ASCII
+    )
+    # Every DANGEROUS_PATTERNS entry and every character html.escape rewrites contains one of these
+    _MARKUP_CHAR_REGEX = re.compile(r'[<>&\'":=(]')
     
     # SQL injection patterns
     SQL_INJECTION_PATTERNS = [
@@ -56,6 +66,32 @@ class InputValidator:
         r'(?:script|javascript|vbscript|onload|onerror)',  # XSS patterns
         r'(?:\<|\>|&lt;|&gt;)',       # HTML brackets
     ]
+    # Single alternation so each input is scanned once; the group name maps a hit back to its pattern
+    _SQL_INJECTION_REGEX = re.compile(
+        '|'.join(f'(?P<p{index}>{pattern})' for index, pattern in enumerate(SQL_INJECTION_PATTERNS)),
+        re.IGNORECASE | re.ASCII
+    )
+    
+    _API_KEY_NAME_REGEX = re.compile(r'^[a-zA-Z0-9\s\-_]+$')
+    _LANGUAGE_CODE_REGEX = re.compile(r'^[a-z]{2,3}(-[a-z]{2})?$')
+    
+    VALID_QUALITIES = (
+        'best', 'worst', 'bestvideo', 'worstvideo',
+        '144p', '240p', '360p', '480p', '720p', '1080p', '1440p', '2160p', '4320p'
+    )
+    # Maps each accepted value to its canonical (interned literal) string
+    _CANONICAL_QUALITIES = {quality: quality for quality in VALID_QUALITIES}
+    
+    VALID_FORMATS = ('mp4', 'mkv', 'webm', 'avi', 'flv', 'm4a', 'mp3', 'aac', 'ogg', 'wav')
+    _CANONICAL_FORMATS = {format_setting: format_setting for format_setting in VALID_FORMATS}
+    
+    # Safe HTML allowlist used when allow_html=True. nh3 also drops <script>/<style>
+    # contents and re-serializes kept text, decoding character references
+    # (&#x41; -> A) except where escaping is required (&amp;, &lt;, &gt;)
+    ALLOWED_HTML_TAGS = frozenset({'b', 'i', 'u', 'strong', 'em', 'p', 'br', 'a'})
+    # '*' overrides nh3's default generic attributes (title, lang, ...) on every tag
+    ALLOWED_HTML_ATTRIBUTES = {'a': frozenset({'href', 'title'}), '*': frozenset()}
+    ALLOWED_URL_SCHEMES = frozenset({'http', 'https', 'mailto'})
     
     @staticmethod
     def sanitize_string(
@@ -89,73 +125,92 @@ class InputValidator:
         if max_length and len(sanitized) > max_length:
             raise ValueError(f"Input too long: {len(sanitized)} > {max_length}")
         
+        # Plain text can't match a dangerous pattern and is left unchanged by html.escape
+        has_markup = InputValidator._MARKUP_CHAR_REGEX.search(sanitized) is not None
+        
         # Strip dangerous patterns
-        if strip_dangerous:
-            for pattern in InputValidator.DANGEROUS_PATTERNS:
-                if re.search(pattern, sanitized, re.IGNORECASE):
-                    logger.warning(f"Dangerous pattern detected: {pattern}")
-                    sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE)
+        # One scan with the combined pattern before the per-pattern passes, which
+        # stay sequential so text exposed by one removal is still caught by later patterns
+        if strip_dangerous and has_markup and InputValidator._ANY_DANGEROUS_REGEX.search(sanitized):
+            for regex in InputValidator._DANGEROUS_REGEXES:
+                sanitized, count = regex.subn('', sanitized)
+                if count:
+                    logger.warning(f"Dangerous pattern detected: {regex.pattern}")
         
         # Handle HTML
         if not allow_html:
             # Escape HTML entities
-            sanitized = html.escape(sanitized)
+            if has_markup:
+                sanitized = html.escape(sanitized)
         else:
-            # Allow only safe HTML tags
-            allowed_tags = ['b', 'i', 'u', 'strong', 'em', 'p', 'br', 'a']
-            allowed_attributes = {'a': ['href', 'title']}
-            sanitized = bleach.clean(
-                sanitized, 
-                tags=allowed_tags, 
-                attributes=allowed_attributes,
-                strip=True
+            # Allow only safe HTML tags; disallowed tags are stripped, keeping their text
+            sanitized = nh3.clean(
+                sanitized,
+                tags=InputValidator.ALLOWED_HTML_TAGS,
+                attributes=InputValidator.ALLOWED_HTML_ATTRIBUTES,
+                url_schemes=InputValidator.ALLOWED_URL_SCHEMES,
+                link_rel=None
             )
         
         return sanitized
     
     @staticmethod
-    def validate_youtube_url(url: str) -> Dict[str, Any]:
+    @functools.lru_cache(maxsize=1024)
+    def _parse_youtube_url(url: str) -> Tuple[str, str, ParseResult]:
         """
-        Validate and extract information from YouTube URL.
+        Normalize a YouTube URL and extract its video ID and components.
+        
+        Results are immutable and cached, since the same URLs are submitted repeatedly.
         
-        Args:
-            url: YouTube URL to validate
-            
-        Returns:
-            dict: URL validation result with video_id if valid
-            
         Raises:
             ValueError: If URL is invalid
         """
-        if not isinstance(url, str):
-            raise ValueError("URL must be a string")
-        
-        # Basic URL validation
-        if not validators.url(url) and not url.startswith('youtu'):
+        # Basic URL validation; only scheme-less URLs can be rejected here, so
+        # skip the (comparatively slow) validators check for http(s) and youtu.be input
+        if not url.startswith(('http', 'youtu')) and not validators.url(url):
             # Try to add protocol if missing
-            if not url.startswith('http'):
-                url = 'https://' + url
-                if not validators.url(url):
-                    raise ValueError("Invalid URL format")
+            url = 'https://' + url
+            if not validators.url(url):
+                raise ValueError("Invalid URL format")
         
         # Extract video ID using patterns
         video_id = None
-        for pattern in InputValidator.YOUTUBE_PATTERNS:
-            match = re.search(pattern, url)
+        for regex in InputValidator._YOUTUBE_REGEXES:
+            match = regex.search(url)
             if match:
                 video_id = match.group(1)
                 break
         
+        # Every pattern captures exactly [a-zA-Z0-9_-]{11}, so a match is already a well-formed ID
         if not video_id:
             raise ValueError("Invalid YouTube URL: cannot extract video ID")
         
-        # Validate video ID format
-        if not re.match(r'^[a-zA-Z0-9_-]{11}$', video_id):
-            raise ValueError("Invalid YouTube video ID format")
-        
         # Parse URL components
         parsed_url = urlparse(url if url.startswith('http') else 'https://' + url)
         
+        return url, video_id, parsed_url
+    
+    @staticmethod
+    def validate_youtube_url(url: str, include_query_params: bool = True) -> Dict[str, Any]:
+        """
+        Validate and extract information from YouTube URL.
+        
+        Args:
+            url: YouTube URL to validate
+            include_query_params: Whether to parse the query string into query_params;
+                callers that only need the video ID can skip it (query_params is then empty)
+            
+        Returns:
+            dict: URL validation result with video_id if valid
+            
+        Raises:
+            ValueError: If URL is invalid
+        """
+        if not isinstance(url, str):
+            raise ValueError("URL must be a string")
+        
+        url, video_id, parsed_url = InputValidator._parse_youtube_url(url)
+        
         return {
             'is_valid': True,
             'video_id': video_id,
@@ -163,7 +218,7 @@ class InputValidator:
             'canonical_url': f'https://www.youtube.com/watch?v={video_id}',
             'domain': parsed_url.netloc,
             'path': parsed_url.path,
-            'query_params': parse_qs(parsed_url.query)
+            'query_params': parse_qs(parsed_url.query) if include_query_params else {}
         }
     
     @staticmethod
@@ -189,16 +244,16 @@ class InputValidator:
             max_length=100, 
             allow_html=False, 
             strip_dangerous=True
-        )
+        ).strip()
         
-        if len(sanitized.strip()) < 1:
+        if not sanitized:
             raise ValueError("API key name cannot be empty")
         
         # Check for only alphanumeric, spaces, hyphens, underscores
-        if not re.match(r'^[a-zA-Z0-9\s\-_]+$', sanitized):
+        if not InputValidator._API_KEY_NAME_REGEX.match(sanitized):
             raise ValueError("API key name contains invalid characters")
         
-        return sanitized.strip()
+        return sanitized
     
     @staticmethod
     def validate_description(description: Optional[str], max_length: int = 500) -> Optional[str]:
@@ -227,9 +282,9 @@ class InputValidator:
             max_length=max_length,
             allow_html=False,
             strip_dangerous=True
-        )
+        ).strip()
         
-        return sanitized.strip() if sanitized.strip() else None
+        return sanitized or None
     
     @staticmethod
     def check_sql_injection(input_string: str) -> bool:
@@ -245,10 +300,11 @@ class InputValidator:
         if not isinstance(input_string, str):
             return False
         
-        for pattern in InputValidator.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, input_string, re.IGNORECASE):
-                logger.warning(f"Potential SQL injection pattern detected: {pattern}")
-                return True
+        match = InputValidator._SQL_INJECTION_REGEX.search(input_string)
+        if match:
+            pattern = InputValidator.SQL_INJECTION_PATTERNS[int(match.lastgroup[1:])]
+            logger.warning(f"Potential SQL injection pattern detected: {pattern}")
+            return True
         
         return False
     
@@ -305,20 +361,18 @@ class InputValidator:
         Raises:
             ValueError: If quality is invalid
         """
-        valid_qualities = [
-            'best', 'worst', 'bestvideo', 'worstvideo',
-            '144p', '240p', '360p', '480p', '720p', '1080p', '1440p', '2160p', '4320p'
-        ]
-        
         if not isinstance(quality, str):
             raise ValueError("Quality must be a string")
         
-        quality = quality.strip().lower()
+        # Already-canonical input (the common case) needs no normalization
+        canonical = InputValidator._CANONICAL_QUALITIES.get(quality)
+        if canonical is None:
+            canonical = InputValidator._CANONICAL_QUALITIES.get(quality.strip().lower())
         
-        if quality not in valid_qualities:
-            raise ValueError(f"Invalid quality setting. Must be one of: {', '.join(valid_qualities)}")
+        if canonical is None:
+            raise ValueError(f"Invalid quality setting. Must be one of: {', '.join(InputValidator.VALID_QUALITIES)}")
         
-        return quality
+        return canonical
     
     @staticmethod
     def validate_format_setting(format_setting: str) -> str:
@@ -334,17 +388,18 @@ class InputValidator:
         Raises:
             ValueError: If format is invalid
         """
-        valid_formats = ['mp4', 'mkv', 'webm', 'avi', 'flv', 'm4a', 'mp3', 'aac', 'ogg', 'wav']
-        
         if not isinstance(format_setting, str):
             raise ValueError("Format must be a string")
         
-        format_setting = format_setting.strip().lower()
+        # Already-canonical input (the common case) needs no normalization
+        canonical = InputValidator._CANONICAL_FORMATS.get(format_setting)
+        if canonical is None:
+            canonical = InputValidator._CANONICAL_FORMATS.get(format_setting.strip().lower())
         
-        if format_setting not in valid_formats:
-            raise ValueError(f"Invalid format setting. Must be one of: {', '.join(valid_formats)}")
+        if canonical is None:
+            raise ValueError(f"Invalid format setting. Must be one of: {', '.join(InputValidator.VALID_FORMATS)}")
         
-        return format_setting
+        return canonical
     
     @staticmethod
     def validate_subtitle_languages(languages: Optional[List[str]]) -> Optional[List[str]]:
@@ -376,7 +431,7 @@ class InputValidator:
             
             # Validate language code format (2-3 characters)
             lang = lang.strip().lower()
-            if not re.match(r'^[a-z]{2,3}(-[a-z]{2})?$', lang):
+            if not InputValidator._LANGUAGE_CODE_REGEX.match(lang):
                 raise ValueError(f"Invalid language code format: {lang}")
             
             validated_languages.append(lang)
@@ -408,32 +463,70 @@ class SecurityValidationMixin:
 
 # Custom Pydantic field types with built-in validation
 
-def YouTubeUrlField(**kwargs):
-    """Custom Pydantic field for YouTube URLs with validation."""
-    def validate_youtube_url(cls, v):
-        try:
-            result = InputValidator.validate_youtube_url(v)
-            return result['canonical_url']
-        except ValueError as e:
-            raise ValueError(f"Invalid YouTube URL: {e}")
+def _validate_youtube_url_field(v: str) -> str:
+    """Validate a YouTube URL field value and return its canonical URL."""
+    try:
+        result = InputValidator.validate_youtube_url(v, include_query_params=False)
+        return result['canonical_url']
+    except ValueError as e:
+        raise ValueError(f"Invalid YouTube URL: {e}")
+
+
+_YOUTUBE_URL_VALIDATOR = AfterValidator(_validate_youtube_url_field)
+
+YouTubeUrl = Annotated[str, _YOUTUBE_URL_VALIDATOR]
+
+
+def YouTubeUrlField(**kwargs) -> Any:
+    """
+    Custom Pydantic field for YouTube URLs with validation.
     
-    return validator('*', allow_reuse=True)(validate_youtube_url)
+    Use as a default, e.g. ``url: str = YouTubeUrlField()``; keyword arguments are
+    passed to ``Field``. Equivalent to annotating with ``YouTubeUrl``.
+    """
+    field = Field(**kwargs)
+    field.metadata.append(_YOUTUBE_URL_VALIDATOR)
+    return field
 
 
-def SafeStringField(max_length: int = 500, **kwargs):
-    """Custom Pydantic field for safe string input."""
-    def validate_safe_string(cls, v):
-        if not isinstance(v, str):
-            raise ValueError("Field must be a string")
+@functools.lru_cache(maxsize=None)
+def SafeStringValidator(max_length: int = 500) -> AfterValidator:
+    """
+    Pydantic validator sanitizing a string field, for use in ``Annotated`` metadata.
+    
+    Use for limits other than the ``SafeString`` default, e.g.
+    ``description: Annotated[str, SafeStringValidator(max_length=100)]``.
+    One validator is shared by every field using the same limit.
+    """
+    def validate_safe_string(v: str) -> str:
         return InputValidator.sanitize_string(v, max_length=max_length)
     
-    return validator('*', allow_reuse=True)(validate_safe_string)
+    return AfterValidator(validate_safe_string)
+
+
+SafeString = Annotated[str, SafeStringValidator()]
+
+
+def SafeStringField(max_length: int = 500, **kwargs) -> Any:
+    """
+    Custom Pydantic field for safe string input.
+    
+    Use as a default, e.g. ``description: str = SafeStringField(max_length=100)``;
+    keyword arguments are passed to ``Field``. Equivalent to annotating with
+    ``Annotated[str, SafeStringValidator(max_length=100)]``.
+    """
+    field = Field(**kwargs)
+    field.metadata.append(SafeStringValidator(max_length))
+    return field
 
 
 # Export main classes and functions
 __all__ = [
     'InputValidator',
     'SecurityValidationMixin', 
+    'YouTubeUrl',
     'YouTubeUrlField',
-    'SafeStringField'
+    'SafeString',
+    'SafeStringField',
+    'SafeStringValidator'
 ]
\ No newline at end of file
@@ -82,7 +82,7 @@ class DownloadRequest(BaseModel, SecurityValidationMixin):
         """Validate YouTube URL using comprehensive validator."""
         url_str = str(v)
         try:
-            validation_result = InputValidator.validate_youtube_url(url_str)
+            validation_result = InputValidator.validate_youtube_url(url_str, include_query_params=False)
             return validation_result['canonical_url']
         except ValueError as e:
             raise ValueError(f'Invalid YouTube URL: {e}')
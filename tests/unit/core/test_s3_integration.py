@@ -7,31 +7,81 @@ encryption, error handling, and various AWS-specific scenarios.
 
 import pytest
 import boto3
+import hashlib
 import json
 import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from unittest.mock import patch, Mock, AsyncMock, MagicMock
 from moto import mock_s3, mock_kms
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
 from pathlib import Path
 
 from app.core.cookie_manager import CookieManager
 
 
+# Client config for tests that share one client across worker threads: a pool
+# large enough for every worker and a small retry budget so moto errors surface fast
+CONCURRENT_S3_CONFIG = Config(max_pool_connections=50, retries={'max_attempts': 2})
+
+
+def _build_cookie_manager(bucket_name):
+    """Build a CookieManager against patched settings and a patched boto3 client."""
+    with patch('app.core.cookie_manager.settings') as mock_settings, \
+            patch('app.core.cookie_manager.boto3.client'):
+        mock_settings.cookie_temp_dir = None
+        mock_settings.cookie_refresh_interval = 3600
+        mock_settings.cookie_validation_enabled = True
+        mock_settings.cookie_backup_count = 3
+        
+        return CookieManager(
+            bucket_name=bucket_name,
+            encryption_key="test-key-1234567890123456789012345678",
+            aws_region="us-east-1"
+        )
+
+
 class TestS3Integration:
     """Test suite for S3 integration functionality."""
     
     @pytest.fixture
-    def aws_credentials(self, mock_cookie_settings):
+    def aws_credentials(self, mock_cookie_settings, monkeypatch):
         """Mocked AWS Credentials for moto."""
-        import os
-        os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-        os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-        os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-        os.environ['AWS_SESSION_TOKEN'] = 'testing'
-        os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+        monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        monkeypatch.setenv('AWS_SECURITY_TOKEN', 'testing')
+        monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
+        monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    
+    @pytest.fixture
+    def bucket_name(self):
+        """Unique bucket name so tests can run in parallel without colliding."""
+        return f"cookie-bucket-{uuid.uuid4().hex[:12]}"
+    
+    @pytest.fixture(scope="class")
+    def kms_client(self):
+        """KMS client shared by the KMS tests; moto intercepts its calls per test."""
+        return boto3.client(
+            'kms',
+            region_name='us-east-1',
+            aws_access_key_id='testing',
+            aws_secret_access_key='testing'
+        )
+    
+    @pytest.fixture(scope="class")
+    def shared_cipher_suite(self):
+        """Cipher derived once per class; its PBKDF2 key derivation dominates CookieManager construction."""
+        return _build_cookie_manager("test-cookie-bucket")._cipher_suite
     
     @pytest.fixture
+    def cookie_manager(self, shared_cipher_suite, bucket_name):
+        """Fresh CookieManager per test, reusing the class's derived cipher."""
+        with patch.object(CookieManager, '_initialize_encryption', return_value=shared_cipher_suite):
+            return _build_cookie_manager(bucket_name)
+    
+    @pytest.fixture(scope="session")
     def sample_cookie_content(self):
         """Sample cookie file content for testing."""
         return """# Netscape HTTP Cookie File
@@ -39,12 +89,18 @@ class TestS3Integration:
 .google.com\tTRUE\t/\tFALSE\t1735689600\tAUTH_TOKEN\tdef456
 """
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
+    def sample_cookie_bytes(self, sample_cookie_content):
+        """UTF-8 encoded sample cookie content, used as upload body."""
+        return sample_cookie_content.encode('utf-8')
+    
+    @pytest.fixture(scope="session")
     def sample_metadata(self):
         """Sample cookie metadata for testing."""
+        upload_date = datetime(2024, 1, 1)
         return {
-            "upload_date": datetime.now().isoformat(),
-            "expiry_date": (datetime.now() + timedelta(days=30)).isoformat(),
+            "upload_date": upload_date.isoformat(),
+            "expiry_date": (upload_date + timedelta(days=30)).isoformat(),
             "cookie_count": 2,
             "domains": [".youtube.com", ".google.com"],
             "format": "netscape",
@@ -53,11 +109,10 @@ class TestS3Integration:
         }
     
     @mock_s3
-    def test_s3_bucket_creation_and_access(self, aws_credentials):
+    def test_s3_bucket_creation_and_access(self, aws_credentials, bucket_name):
         """Test S3 bucket creation and basic access."""
         # Create S3 client and bucket
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         
         # Create bucket
         s3_client.create_bucket(Bucket=bucket_name)
@@ -72,11 +127,11 @@ class TestS3Integration:
         assert response['ResponseMetadata']['HTTPStatusCode'] == 200
     
     @mock_s3
-    def test_s3_file_upload_download_operations(self, aws_credentials, sample_cookie_content):
+    def test_s3_file_upload_download_operations(self, aws_credentials, bucket_name,
+                                                sample_cookie_content, sample_cookie_bytes):
         """Test basic S3 file upload and download operations."""
         # Setup S3 client and bucket
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Test file upload
@@ -84,14 +139,16 @@ class TestS3Integration:
         s3_client.put_object(
             Bucket=bucket_name,
             Key=key,
-            Body=sample_cookie_content,
+            Body=sample_cookie_bytes,
             ServerSideEncryption='AES256'
         )
         
         # Verify file exists
-        objects = s3_client.list_objects_v2(Bucket=bucket_name)
-        assert 'Contents' in objects
-        assert any(obj['Key'] == key for obj in objects['Contents'])
+        try:
+            head_response = s3_client.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            pytest.fail(f"Uploaded object not found: {e}")
+        assert head_response['ResponseMetadata']['HTTPStatusCode'] == 200
         
         # Test file download
         response = s3_client.get_object(Bucket=bucket_name, Key=key)
@@ -102,16 +159,15 @@ class TestS3Integration:
         assert response['ServerSideEncryption'] == 'AES256'
     
     @mock_s3
-    def test_s3_metadata_operations(self, aws_credentials, sample_metadata):
+    def test_s3_metadata_operations(self, aws_credentials, bucket_name, sample_metadata):
         """Test S3 metadata upload and retrieval operations."""
         # Setup S3 client and bucket
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Upload metadata as JSON
         metadata_key = 'cookies/metadata.json'
-        metadata_json = json.dumps(sample_metadata, indent=2)
+        metadata_json = json.dumps(sample_metadata, separators=(',', ':'))
         
         s3_client.put_object(
             Bucket=bucket_name,
@@ -130,11 +186,10 @@ class TestS3Integration:
         assert response['ServerSideEncryption'] == 'AES256'
     
     @mock_s3
-    def test_s3_versioning_functionality(self, aws_credentials, sample_cookie_content):
+    def test_s3_versioning_functionality(self, aws_credentials, bucket_name, sample_cookie_bytes):
         """Test S3 versioning for cookie file history."""
         # Setup S3 client and bucket with versioning
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Enable versioning
@@ -145,17 +200,18 @@ class TestS3Integration:
         
         # Upload multiple versions of the same file
         key = 'cookies/active-cookies.txt'
+        original_content = sample_cookie_bytes
+        modified_content = original_content + b"\n.googleapis.com\tTRUE\t/\tFALSE\t1735689600\tAPI_KEY\tghi789"
         
         # Version 1
         s3_client.put_object(
             Bucket=bucket_name,
             Key=key,
-            Body=sample_cookie_content,
+            Body=original_content,
             ServerSideEncryption='AES256'
         )
         
         # Version 2 (modified content)
-        modified_content = sample_cookie_content + "\n.googleapis.com\tTRUE\t/\tFALSE\t1735689600\tAPI_KEY\tghi789"
         s3_client.put_object(
             Bucket=bucket_name,
             Key=key,
@@ -164,26 +220,28 @@ class TestS3Integration:
         )
         
         # List versions
-        versions = s3_client.list_object_versions(Bucket=bucket_name, Prefix=key)
+        paginator = s3_client.get_paginator('list_object_versions')
+        versions = paginator.paginate(
+            Bucket=bucket_name,
+            Prefix=key,
+            PaginationConfig={'PageSize': 10}
+        ).build_full_result()
         assert 'Versions' in versions
         assert len(versions['Versions']) == 2
         
         # Download latest version
         response = s3_client.get_object(Bucket=bucket_name, Key=key)
-        latest_content = response['Body'].read().decode('utf-8')
-        assert latest_content == modified_content
+        assert response['Body'].read() == modified_content
         
         # Download specific version
         version_id = versions['Versions'][1]['VersionId']  # Older version
         response = s3_client.get_object(Bucket=bucket_name, Key=key, VersionId=version_id)
-        version_content = response['Body'].read().decode('utf-8')
-        assert version_content == sample_cookie_content
+        assert response['Body'].read() == original_content
     
     @mock_s3
-    def test_s3_error_handling_scenarios(self, aws_credentials):
+    def test_s3_error_handling_scenarios(self, aws_credentials, bucket_name):
         """Test various S3 error scenarios and handling."""
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         
         # Test accessing non-existent bucket
         with pytest.raises(ClientError) as exc_info:
@@ -204,10 +262,9 @@ class TestS3Integration:
         assert exc_info.value.response['Error']['Code'] == 'InvalidBucketName'
     
     @mock_s3
-    def test_s3_large_file_handling(self, aws_credentials):
+    def test_s3_large_file_handling(self, aws_credentials, bucket_name):
         """Test handling of large cookie files."""
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Generate large cookie content (10MB+)
@@ -231,17 +288,17 @@ class TestS3Integration:
         # Download and verify (streaming)
         response = s3_client.get_object(Bucket=bucket_name, Key=key)
         downloaded_size = 0
-        for chunk in response['Body'].iter_chunks(chunk_size=1024):
+        for chunk in response['Body'].iter_chunks(chunk_size=1 << 20):
             downloaded_size += len(chunk)
         
         assert downloaded_size == len(large_cookie_content.encode('utf-8'))
     
     @mock_s3
     @mock_kms
-    def test_s3_kms_encryption_integration(self, aws_credentials, sample_cookie_content):
+    def test_s3_kms_encryption_integration(self, aws_credentials, bucket_name, kms_client,
+                                           sample_cookie_content, sample_cookie_bytes):
         """Test S3 integration with KMS encryption."""
-        # Setup KMS client and create key
-        kms_client = boto3.client('kms', region_name='us-east-1')
+        # Create KMS key
         key_response = kms_client.create_key(
             Description='Test key for cookie encryption',
             Usage='ENCRYPT_DECRYPT'
@@ -250,7 +307,6 @@ class TestS3Integration:
         
         # Setup S3 client and bucket
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Upload with KMS encryption
@@ -258,7 +314,7 @@ class TestS3Integration:
         s3_client.put_object(
             Bucket=bucket_name,
             Key=key,
-            Body=sample_cookie_content,
+            Body=sample_cookie_bytes,
             ServerSideEncryption='aws:kms',
             SSEKMSKeyId=key_id
         )
@@ -273,10 +329,10 @@ class TestS3Integration:
         assert downloaded_content == sample_cookie_content
     
     @mock_s3
-    def test_s3_lifecycle_policies_simulation(self, aws_credentials, sample_cookie_content):
+    def test_s3_lifecycle_policies_simulation(self, aws_credentials, bucket_name,
+                                              sample_cookie_content, sample_cookie_bytes):
         """Test S3 lifecycle policies for cookie file management."""
-        s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
+        s3_client = boto3.client('s3', region_name='us-east-1', config=CONCURRENT_S3_CONFIG)
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Set up lifecycle policy
@@ -319,33 +375,33 @@ class TestS3Integration:
         
         # Upload test files to different prefixes
         prefixes = ['cookies/backup/', 'cookies/history/', 'cookies/active/']
-        for prefix in prefixes:
-            s3_client.put_object(
+        
+        def upload(prefix):
+            return s3_client.put_object(
                 Bucket=bucket_name,
                 Key=f'{prefix}test-cookies.txt',
-                Body=sample_cookie_content,
+                Body=sample_cookie_bytes,
                 ServerSideEncryption='AES256'
             )
         
-        # Verify files exist
-        for prefix in prefixes:
+        def download(prefix):
             response = s3_client.get_object(Bucket=bucket_name, Key=f'{prefix}test-cookies.txt')
-            assert response['Body'].read().decode('utf-8') == sample_cookie_content
+            return response['Body'].read().decode('utf-8')
+        
+        with ThreadPoolExecutor(max_workers=len(prefixes)) as executor:
+            list(executor.map(upload, prefixes))
+            
+            # Verify files exist
+            for content in executor.map(download, prefixes):
+                assert content == sample_cookie_content
     
     @mock_s3
-    def test_s3_concurrent_access_patterns(self, aws_credentials, sample_cookie_content):
+    def test_s3_concurrent_access_patterns(self, aws_credentials, bucket_name,
+                                           sample_cookie_content):
         """Test concurrent S3 access patterns for cookie management."""
-        import threading
-        import time
-        
-        s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
+        s3_client = boto3.client('s3', region_name='us-east-1', config=CONCURRENT_S3_CONFIG)
         s3_client.create_bucket(Bucket=bucket_name)
         
-        # Results tracking
-        results = {'uploads': 0, 'downloads': 0, 'errors': 0}
-        results_lock = threading.Lock()
-        
         def upload_worker(worker_id):
             """Worker function for concurrent uploads."""
             try:
@@ -358,92 +414,59 @@ class TestS3Integration:
                     Body=content,
                     ServerSideEncryption='AES256'
                 )
-                
-                with results_lock:
-                    results['uploads'] += 1
-                    
+                return True
             except Exception:
-                with results_lock:
-                    results['errors'] += 1
+                return False
         
         def download_worker(worker_id):
             """Worker function for concurrent downloads."""
             try:
-                # Wait a bit for uploads to complete
-                time.sleep(0.1)
-                
                 key = f'cookies/worker-{worker_id}-cookies.txt'
                 response = s3_client.get_object(Bucket=bucket_name, Key=key)
                 content = response['Body'].read().decode('utf-8')
-                
-                assert f"# Worker {worker_id} cookies" in content
-                
-                with results_lock:
-                    results['downloads'] += 1
-                    
+                return f"# Worker {worker_id} cookies" in content
             except Exception:
-                with results_lock:
-                    results['errors'] += 1
+                return False
         
-        # Create and start threads
-        threads = []
         num_workers = 5
         
-        # Upload threads
-        for i in range(num_workers):
-            thread = threading.Thread(target=upload_worker, args=(i,))
-            threads.append(thread)
-            thread.start()
-        
-        # Download threads
-        for i in range(num_workers):
-            thread = threading.Thread(target=download_worker, args=(i,))
-            threads.append(thread)
-            thread.start()
-        
-        # Wait for completion
-        for thread in threads:
-            thread.join(timeout=5)
+        # Downloads are only submitted once every upload has completed
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            uploads = list(executor.map(upload_worker, range(num_workers)))
+            downloads = list(executor.map(download_worker, range(num_workers)))
         
         # Verify results
-        assert results['uploads'] == num_workers
-        assert results['downloads'] == num_workers
-        assert results['errors'] == 0
+        assert uploads.count(True) == num_workers
+        assert downloads.count(True) == num_workers
     
     @mock_s3
-    def test_cookie_manager_s3_integration(self, aws_credentials, sample_cookie_content):
+    def test_cookie_manager_s3_integration(self, aws_credentials, bucket_name, cookie_manager,
+                                           sample_cookie_content, sample_cookie_bytes):
         """Test CookieManager integration with S3 operations."""
         # Setup S3 bucket
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Upload test cookie file
         s3_client.put_object(
             Bucket=bucket_name,
             Key='cookies/youtube-cookies-active.txt',
-            Body=sample_cookie_content,
+            Body=sample_cookie_bytes,
             ServerSideEncryption='AES256'
         )
         
-        # Create CookieManager instance
-        with patch('app.core.cookie_manager.boto3.client') as mock_boto:
-            mock_boto.return_value = s3_client
-            
-            cookie_manager = CookieManager(
-                bucket_name=bucket_name,
-                encryption_key="test-key-1234567890123456789012345678"
-            )
-            
-            # Test cookie retrieval through manager
-            result = cookie_manager._download_cookies_from_s3('cookies/youtube-cookies-active.txt')
-            
-            assert result is not None
-            assert isinstance(result, bytes)
-            
-            # Decrypt and verify content
-            decrypted_content = cookie_manager._decrypt_cookie_data(result)
-            assert decrypted_content == sample_cookie_content
+        # Point the shared CookieManager at the mocked S3 client
+        cookie_manager._s3_client = s3_client
+        
+        # Test cookie retrieval through manager
+        result = cookie_manager._download_cookies_from_s3('cookies/youtube-cookies-active.txt')
+        
+        assert result is not None
+        assert isinstance(result, bytes)
+        
+        # Decrypt and verify content
+        decrypted_content = cookie_manager._decrypt_cookie_data(result)
+        assert decrypted_content == sample_cookie_content
     
     def test_s3_credentials_error_handling(self):
         """Test S3 operations with missing or invalid credentials."""
@@ -458,13 +481,13 @@ class TestS3Integration:
             s3_client = boto3.client('s3')
             s3_client.list_buckets()
     
+    @pytest.mark.slow
     @mock_s3
-    def test_s3_performance_benchmarks(self, aws_credentials, sample_cookie_content):
+    def test_s3_performance_benchmarks(self, aws_credentials, bucket_name, sample_cookie_bytes):
         """Test S3 performance benchmarks for cookie operations."""
         import time
         
         s3_client = boto3.client('s3', region_name='us-east-1')
-        bucket_name = 'test-cookie-bucket'
         s3_client.create_bucket(Bucket=bucket_name)
         
         # Benchmark upload performance
@@ -475,7 +498,7 @@ class TestS3Integration:
             s3_client.put_object(
                 Bucket=bucket_name,
                 Key=f'cookies/benchmark-{i}.txt',
-                Body=sample_cookie_content,
+                Body=sample_cookie_bytes,
                 ServerSideEncryption='AES256'
             )
             
@@ -498,11 +521,11 @@ class TestS3Integration:
         assert avg_upload_time < 1.0  # Average upload under 1 second
         assert avg_download_time < 1.0  # Average download under 1 second
         
-        # Verify content integrity
-        for i in range(10):
-            response = s3_client.get_object(Bucket=bucket_name, Key=f'cookies/benchmark-{i}.txt')
-            content = response['Body'].read().decode('utf-8')
-            assert content == sample_cookie_content
+        # Verify content integrity via ETags (single-part uploads use the body MD5)
+        expected_etag = '"' + hashlib.md5(sample_cookie_bytes).hexdigest() + '"'
+        response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix='cookies/benchmark-')
+        assert len(response['Contents']) == 10
+        assert all(obj['ETag'] == expected_etag for obj in response['Contents'])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError, NoCredentialsError
+
+from app.core import storage as _storage_mod
+from app.core.config import AWSSettings
+from app.core.storage import (
+    LocalStorageHandler,
+    S3StorageHandler,
+    get_storage_handler,
+    init_storage,
+    _get_content_type,
+)
+
+
+_ERR_NO_SUCH_BUCKET = ClientError({'Error': {'Code': 'NoSuchBucket'}}, 'head_bucket')
+
+_S3_CLIENT_METHODS = [
+    "head_bucket",
+    "put_object",
+    "get_object",
+    "delete_object",
+    "head_object",
+    "list_objects_v2",
+    "generate_presigned_url",
+]
+
+# read() is idempotent here, so one response can be shared across tests
+_GET_OBJECT_RESPONSE = {'Body': SimpleNamespace(read=lambda: b"test content")}
+
+
+def _build_mock_s3():
+    """Build a mock S3 client restricted to the operations S3StorageHandler uses."""
+    mock_s3 = MagicMock(spec_set=_S3_CLIENT_METHODS)
+    mock_s3.head_bucket.return_value = {}
+    return mock_s3
+
+
+@pytest.mark.xdist_group(name="storage_s3")
+class TestS3StorageHandler:
+    """Test cases for S3StorageHandler."""
+
+    @pytest.fixture(autouse=True, scope="class")
+    def _patch_boto(self):
+        """Patch boto3.client once for the whole class with a shared mock S3 client."""
+        with patch.object(_storage_mod.boto3, 'client') as mock_client:
+            mock_client.return_value = _build_mock_s3()
+            yield mock_client
+
+    @pytest.fixture
+    def mock_s3_client(self, _patch_boto):
+        """Shared mock S3 client, reset after each test."""
+        mock_s3 = _patch_boto.return_value
+        yield mock_s3
+        mock_s3.reset_mock(return_value=True, side_effect=True)
+
+    @pytest.fixture(scope="class")
+    def handler(self, _patch_boto):
+        """Build one S3StorageHandler for the class against the shared mock client."""
+        return S3StorageHandler(bucket_name="test-bucket", region="us-east-1")
+
+    def test_s3_storage_init_success(self, mock_s3_client):
+        """Test successful S3StorageHandler initialization."""
+        mock_s3_client.head_bucket.return_value = {}
+        
+        handler = S3StorageHandler(bucket_name="test-bucket", region="us-east-1")
+        
+        assert handler.bucket_name == "test-bucket"
+        assert handler.region == "us-east-1"
+        assert handler.s3_client == mock_s3_client
+        mock_s3_client.head_bucket.assert_called_once_with(Bucket="test-bucket")
+
+    def test_s3_storage_init_no_bucket(self, monkeypatch):
+        """Test S3StorageHandler initialization without bucket name."""
+        monkeypatch.setattr(
+            _storage_mod,
+            "settings",
+            AWSSettings.model_construct(s3_bucket_name=None, aws_region="us-east-1")
+        )
+        with pytest.raises(ValueError, match="S3 bucket name is required"):
+            S3StorageHandler()
+
+    def test_s3_storage_init_no_credentials(self, mock_s3_client):
+        """Test S3StorageHandler initialization with no credentials."""
+        mock_s3_client.head_bucket.side_effect = NoCredentialsError()
+        
+        with pytest.raises(NoCredentialsError):
+            S3StorageHandler(bucket_name="test-bucket", region="us-east-1")
+
+    def test_s3_storage_init_bucket_error(self, mock_s3_client):
+        """Test S3StorageHandler initialization with bucket access error."""
+        mock_s3_client.head_bucket.side_effect = _ERR_NO_SUCH_BUCKET
+        
+        with pytest.raises(ClientError):
+            S3StorageHandler(bucket_name="test-bucket", region="us-east-1")
+
+    @pytest.mark.asyncio
+    async def test_s3_save_file(self, handler, mock_s3_client):
+        """Test saving file to S3."""
+        mock_s3_client.put_object.return_value = {}
+        
+        result = await handler.save_file("test/file.txt", b"content")
+        
+        assert result is True
+        mock_s3_client.put_object.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_s3_get_file(self, handler, mock_s3_client):
+        """Test getting file from S3."""
+        mock_s3_client.get_object.return_value = _GET_OBJECT_RESPONSE
+        
+        content = await handler.get_file("test/file.txt")
+        
+        assert content == b"test content"
+        mock_s3_client.get_object.assert_called_once_with(
+            Bucket="test-bucket", Key="test/file.txt"
+        )
+
+    @pytest.mark.asyncio
+    async def test_s3_file_exists(self, handler, mock_s3_client):
+        """Test checking file existence in S3."""
+        mock_s3_client.head_object.return_value = {}
+        
+        exists = await handler.file_exists("test/file.txt")
+        
+        assert exists is True
+        mock_s3_client.head_object.assert_called_once_with(
+            Bucket="test-bucket", Key="test/file.txt"
+        )
+
+    @pytest.mark.parametrize("file_path,expected", [
+        ("video.mp4", "video/mp4"),
+        ("audio.mp3", "audio/mpeg"),
+        ("subtitle.srt", "text/srt"),
+        ("VIDEO.MKV", "video/x-matroska"),
+        ("unknown.xyz", "application/octet-stream"),
+    ])
+    def test_get_content_type(self, file_path, expected):
+        """Test _get_content_type lookup."""
+        assert _get_content_type(file_path) == expected
+
+
+class TestStorageFactory:
+    """Test cases for storage factory functions."""
+
+    @pytest.fixture(autouse=True)
+    def _reset_singleton(self, monkeypatch):
+        """Start each test without a cached global storage handler."""
+        monkeypatch.setattr(_storage_mod, "storage", None)
+
+    def test_get_storage_handler_localhost(self, monkeypatch):
+        """Test get_storage_handler for localhost environment."""
+        monkeypatch.setattr(_storage_mod.settings, "environment", "localhost")
+        monkeypatch.setattr(_storage_mod.settings, "download_base_path", "/tmp/downloads")
+        
+        handler = get_storage_handler()
+        
+        assert isinstance(handler, LocalStorageHandler)
+
+    @patch.object(_storage_mod.boto3, 'client')
+    def test_get_storage_handler_aws(self, mock_boto3_client, monkeypatch):
+        """Test get_storage_handler for AWS environment."""
+        # The base Settings model has no S3 fields; use the AWS variant without env validation
+        monkeypatch.setattr(
+            _storage_mod,
+            "settings",
+            AWSSettings.model_construct(s3_bucket_name="test-bucket", aws_region="us-east-1")
+        )
+        
+        mock_boto3_client.return_value = _build_mock_s3()
+        
+        handler = get_storage_handler()
+        
+        assert isinstance(handler, S3StorageHandler)
+        assert handler.bucket_name == "test-bucket"
+
+    def test_get_storage_handler_fallback(self, monkeypatch):
+        """Test get_storage_handler fallback to local storage."""
+        monkeypatch.setattr(_storage_mod.settings, "environment", "aws")
+        monkeypatch.setattr(_storage_mod.settings, "download_base_path", "/tmp/downloads")
+        
+        handler = get_storage_handler()
+        
+        assert isinstance(handler, LocalStorageHandler)
+
+    @patch.object(_storage_mod, 'get_storage_handler')
+    def test_init_storage(self, mock_get_handler):
+        """Test init_storage function."""
+        mock_handler = MagicMock()
+        mock_get_handler.return_value = mock_handler
+        
+        # Second call should return the cached handler without rebuilding it
+        assert init_storage() is mock_handler
+        assert init_storage() is mock_handler
+        assert mock_get_handler.call_count == 1
@@ -6,13 +6,17 @@ YouTube URL parsing, and input sanitization functionality.
 """
 
 import pytest
+from typing import Annotated
 from pydantic import BaseModel, ValidationError
 
 from app.core.validation import (
     InputValidator,
     SecurityValidationMixin,
+    YouTubeUrl,
     YouTubeUrlField,
-    SafeStringField
+    SafeString,
+    SafeStringField,
+    SafeStringValidator
 )
 
 
@@ -77,10 +81,41 @@ class TestInputValidator:
         # HTML should be escaped, not removed
         assert "&lt;" in result or "&gt;" in result
         
-        # Allow HTML - bleach should clean but preserve safe tags
+        # Allow HTML - nh3 should clean but preserve safe tags
         result = InputValidator.sanitize_string(html_string, allow_html=True)
         assert "Hello" in result and "world" in result
-        # Should contain some HTML tags (bleach preserves safe ones)
+        # Should contain some HTML tags (nh3 preserves safe ones)
+
+    def test_sanitize_string_html_drops_generic_attributes(self):
+        """Test that allowed tags keep only explicitly allowed attributes."""
+        result = InputValidator.sanitize_string('<b title="t" lang="en">x</b>', allow_html=True)
+        assert result == "<b>x</b>"
+
+        result = InputValidator.sanitize_string('<a href="https://example.com" title="t">x</a>', allow_html=True)
+        assert result == '<a href="https://example.com" title="t">x</a>'
+
+    def test_sanitize_string_html_drops_non_http_schemes(self):
+        """Test that links with non-http(s)/mailto schemes lose their href."""
+        result = InputValidator.sanitize_string('<a href="ftp://example.com">x</a>', allow_html=True)
+        assert result == "<a>x</a>"
+
+        result = InputValidator.sanitize_string('<a href="mailto:a@example.com">x</a>', allow_html=True)
+        assert result == '<a href="mailto:a@example.com">x</a>'
+
+    def test_sanitize_string_html_drops_script_content(self):
+        """Test that nh3 drops script/style contents even without dangerous pattern stripping."""
+        for html_string in ("<script>alert(1)</script>hi", "<script>\nalert(1)\n</script>hi", "<style>b{}</style>hi"):
+            result = InputValidator.sanitize_string(html_string, allow_html=True, strip_dangerous=False)
+            assert result == "hi"
+        
+        # Multiline script missed by the dangerous pattern regex is still removed by nh3
+        result = InputValidator.sanitize_string("<script>\nalert(1)\n</script>hi", allow_html=True)
+        assert result == "hi"
+    
+    def test_sanitize_string_html_entity_handling(self):
+        """Test that nh3 decodes character references, keeping required escapes."""
+        result = InputValidator.sanitize_string("<b>&#x41;&#66;</b> &amp; &lt;i&gt;", allow_html=True)
+        assert result == "<b>AB</b> &amp; &lt;i&gt;"
     
     def test_sanitize_string_invalid_input(self):
         """Test sanitization with invalid input types."""
@@ -137,6 +172,15 @@ class TestInputValidator:
         assert "t" in result["query_params"]
         assert result["query_params"]["t"] == ["30s"]
     
+    def test_validate_youtube_url_without_query_params(self):
+        """Test YouTube URL validation can skip query string parsing."""
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=30s"
+        result = InputValidator.validate_youtube_url(url, include_query_params=False)
+        
+        assert result["video_id"] == "dQw4w9WgXcQ"
+        assert result["canonical_url"] == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert result["query_params"] == {}
+    
     def test_validate_api_key_name(self):
         """Test API key name validation."""
         # Valid names
@@ -389,6 +433,20 @@ class TestCustomPydanticFields:
         
         with pytest.raises(ValidationError):
             TestModel(url="https://www.google.com")
+        
+        with pytest.raises(ValidationError):
+            TestModel(url="not a url")
+    
+    def test_youtube_url_annotation(self):
+        """Test YouTubeUrl annotation validates like YouTubeUrlField."""
+        class TestModel(BaseModel):
+            url: YouTubeUrl
+        
+        model = TestModel(url="https://youtu.be/dQw4w9WgXcQ")
+        assert model.url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        
+        with pytest.raises(ValidationError):
+            TestModel(url="https://www.google.com")
     
     def test_safe_string_field_clean(self):
         """Test SafeStringField with clean strings."""
@@ -420,6 +478,34 @@ class TestCustomPydanticFields:
         # Exceeds limit
         with pytest.raises(ValidationError):
             TestModel(short_desc="This description is way too long for the limit")
+    
+    def test_safe_string_annotations(self):
+        """Test SafeString and SafeStringValidator annotations validate like SafeStringField."""
+        class TestModel(BaseModel):
+            description: SafeString
+            short_desc: Annotated[str, SafeStringValidator(max_length=10)]
+        
+        model = TestModel(description="<script>alert('xss')</script>Clean text", short_desc="Short")
+        assert "script" not in model.description.lower()
+        assert "Clean text" in model.description
+        assert model.short_desc == "Short"
+        
+        # Default 500 character limit
+        with pytest.raises(ValidationError):
+            TestModel(description="x" * 501, short_desc="Short")
+        
+        with pytest.raises(ValidationError):
+            TestModel(description="Clean", short_desc="This description is way too long for the limit")
+    
+    def test_custom_fields_only_validate_their_own_field(self):
+        """Test custom field types leave other fields on the model untouched."""
+        class TestModel(BaseModel):
+            url: YouTubeUrl
+            title: str
+        
+        model = TestModel(url="https://youtu.be/dQw4w9WgXcQ", title="<b>Not a URL</b>")
+        assert model.url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert model.title == "<b>Not a URL</b>"
 
 
 class TestValidationIntegration: